@@ -1,13 +1,32 @@
 # admin_app.py
 
 import os
-import csv
+import io
 import json
+import asyncio
+import time
+import functools
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import pandas as pd
 import streamlit as st
 from streamlit_autorefresh import st_autorefresh
-from openai import OpenAI
+import openai
+from openai import OpenAI, AsyncOpenAI
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential, wait_random
 import re
 
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder/decoder
+    orjson = None
+
+try:
+    import polars as pl
+except ImportError:  # fall back to encoding JSONL rows one by one
+    pl = None
+
 ###############################################################################
 # 0. Default/Pre-created Fine-Tuned Models
 #    Each entry is a dict: {"id": <OpenAI model ID>, "public": bool}
@@ -32,95 +51,422 @@ PRE_CREATED_MODELS = {
 ###############################################################################
 MODELS_JSON_FILE = "my_saved_models.json"
 
+def _json_dumps(obj, indent=False) -> bytes:
+    """Serialize `obj` to UTF-8 JSON bytes, using orjson when it's installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
+
+def _json_loads(data: bytes):
+    """Parse JSON bytes, using orjson when it's installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 def load_saved_models():
     """
     Load previously saved models from local JSON file, or return an empty dict.
     Each model is stored as: alias -> {"id": <str>, "public": <bool>}
+    The parsed result is cached per file modification time.
     """
-    if os.path.exists(MODELS_JSON_FILE):
-        try:
-            with open(MODELS_JSON_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                # Convert older string-based entries if needed
-                if isinstance(data, dict):
-                    converted = {}
-                    for alias, val in data.items():
-                        if isinstance(val, str):
-                            # Old style: just "id" in string
-                            converted[alias] = {"id": val, "public": True}
-                        elif isinstance(val, dict):
-                            if "id" not in val:
-                                continue  # skip invalid entries
-                            if "public" not in val:
-                                val["public"] = True
-                            converted[alias] = val
-                    return converted
-        except Exception as e:
-            st.warning(f"Could not read {MODELS_JSON_FILE}: {e}")
-    return {}
+    if not os.path.exists(MODELS_JSON_FILE):
+        return {}
+    return _load_saved_models_cached(os.path.getmtime(MODELS_JSON_FILE))
+
+@st.cache_data(show_spinner=False)
+def _load_saved_models_cached(mtime: float):
+    """Parse MODELS_JSON_FILE; `mtime` is only the cache key."""
+    try:
+        with open(MODELS_JSON_FILE, "rb") as f:
+            data = _json_loads(f.read())
+    except Exception as e:
+        st.warning(f"Could not read {MODELS_JSON_FILE}: {e}")
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    # Already in the current format: nothing to convert
+    if all(isinstance(val, dict) and "id" in val and "public" in val for val in data.values()):
+        return data
+
+    # Convert older string-based entries once, and write the result back
+    # so later loads take the fast path above
+    converted = {}
+    for alias, val in data.items():
+        if isinstance(val, str):
+            # Old style: just "id" in string
+            converted[alias] = {"id": val, "public": True}
+        elif isinstance(val, dict):
+            if "id" not in val:
+                continue  # skip invalid entries
+            if "public" not in val:
+                val["public"] = True
+            converted[alias] = val
+    try:
+        _write_models_file(converted)
+    except Exception as e:
+        st.warning(f"Could not write converted models to {MODELS_JSON_FILE}: {e}")
+    return converted
+
+def _write_models_file(models_dict):
+    """Write alias -> {id, public} to MODELS_JSON_FILE (without touching the load cache)."""
+    with open(MODELS_JSON_FILE, "wb") as f:
+        f.write(_json_dumps(models_dict, indent=True))
 
 def save_saved_models(models_dict):
     """
     Save the given dictionary of alias -> {id, public} to local JSON file.
     """
     try:
-        with open(MODELS_JSON_FILE, "w", encoding="utf-8") as f:
-            json.dump(models_dict, f, indent=2)
+        _write_models_file(models_dict)
     except Exception as e:
         st.error(f"Error saving models to {MODELS_JSON_FILE}: {e}")
+    finally:
+        _load_saved_models_cached.clear()
 
 ###############################################################################
 # 2. CSV Reading & JSONL Building
 ###############################################################################
-def read_rows_from_multiple_csvs(uploaded_files):
+CSV_COLUMNS = ("Parsed From", "Parsed Subject", "Parsed Body")
+CSV_REQUIRED_COLUMNS = ("Parsed From",)  # the others default to "" when absent
+CSV_MAX_PARSE_THREADS = 8
+JSONL_FLUSH_BYTES = 64 * 1024
+
+def _read_csv_columns(file_obj, usecols):
     """
-    Given multiple Streamlit-uploaded CSV files,
-    read them all into a single list of row dicts.
+    Parse one CSV file into a DataFrame of `usecols` (all str); returns (frame, error).
+    Missing columns are filled with "", except CSV_REQUIRED_COLUMNS, which are an error.
     """
-    all_rows = []
-    for file_obj in uploaded_files:
-        try:
-            file_content = file_obj.getvalue().decode("utf-8", errors="replace")
-            reader = csv.DictReader(file_content.splitlines())
-            for row in reader:
-                all_rows.append(row)
-        except Exception as e:
-            st.error(f"Error reading file {file_obj.name}: {e}")
-    return all_rows
+    try:
+        file_obj.seek(0)
+        frame = pd.read_csv(
+            file_obj,
+            usecols=lambda col: col in usecols,
+            dtype=str,
+            na_filter=False,
+            engine="c",
+            encoding="utf-8",
+            encoding_errors="replace",
+        )
+        missing = [col for col in CSV_REQUIRED_COLUMNS if col in usecols and col not in frame.columns]
+        if missing:
+            raise ValueError(f"missing column(s): {', '.join(missing)}")
+        return frame.reindex(columns=list(usecols), fill_value=""), None
+    except Exception as e:
+        return None, e
 
-def build_jsonl_for_senders(all_rows, selected_senders, output_jsonl="filtered_data.jsonl"):
+def read_rows_from_multiple_csvs(uploaded_files, usecols=CSV_COLUMNS):
     """
-    Filters rows to those matching ANY chosen senders, writes them to a chat-format JSONL.
+    Given multiple Streamlit-uploaded CSV files, return one DataFrame per
+    readable file holding only the `usecols` columns (all read as str).
+    Files are parsed in parallel threads; pandas' C parser releases the GIL.
     """
-    count = 0
-    lower_senders = [s.lower() for s in selected_senders]
-
-    with open(output_jsonl, "w", encoding="utf-8") as f_out:
-        for row in all_rows:
-            parsed_sender = (row.get("Parsed From") or "").strip().lower()
-            if parsed_sender in lower_senders:
-                subject = row.get("Parsed Subject", "").strip()
-                body = row.get("Parsed Body", "").strip()
+    if not uploaded_files:
+        return []
+    with ThreadPoolExecutor(max_workers=min(CSV_MAX_PARSE_THREADS, len(uploaded_files))) as ex:
+        results = list(ex.map(lambda f: _read_csv_columns(f, usecols), uploaded_files))
+
+    # Report errors here rather than in the workers, which have no Streamlit context
+    frames = []
+    for file_obj, (frame, error) in zip(uploaded_files, results):
+        if error is not None:
+            st.error(f"Error reading file {file_obj.name}: {error}")
+        else:
+            frames.append(frame)
+    return frames
 
-                user_content = f"Subject: {subject}\nPlease respond with the email body style."
-                assistant_content = body
+@st.cache_data(show_spinner="Parsing CSVs...")
+def parse_uploaded_csvs(named_files: tuple) -> tuple:
+    """
+    Parse a tuple of (file name, file bytes) pairs into one DataFrame of
+    CSV_COLUMNS plus the sorted list of unique, non-empty senders.
+    Cached on the file contents, so reruns skip parsing until the uploads change.
+    """
+    file_objs = []
+    for name, data in named_files:
+        file_obj = io.BytesIO(data)
+        file_obj.name = name
+        file_objs.append(file_obj)
+
+    frames = read_rows_from_multiple_csvs(file_objs)
+    if not frames:
+        return pd.DataFrame(columns=list(CSV_COLUMNS), dtype=str), []
+
+    rows_df = pd.concat(frames, ignore_index=True)
+    from_col = rows_df["Parsed From"].str.strip()
+    senders = sorted(from_col[from_col != ""].unique())
+    return rows_df, senders
+
+def _write_messages_ndjson(f_out, user_contents, assistant_contents):
+    """
+    Write one chat-format JSONL line per (user, assistant) pair with polars,
+    which encodes the whole column in native code instead of a dict per row.
+    """
+    pl.DataFrame(
+        {"user": user_contents.tolist(), "assistant": assistant_contents.tolist()},
+        schema={"user": pl.String, "assistant": pl.String}
+    ).select(
+        messages=pl.concat_list(
+            pl.struct(role=pl.lit("user"), content=pl.col("user")),
+            pl.struct(role=pl.lit("assistant"), content=pl.col("assistant"))
+        )
+    ).write_ndjson(f_out)
 
+def build_jsonl_for_senders(row_chunks, selected_senders, output_jsonl="filtered_data.jsonl"):
+    """
+    Filters rows to those matching ANY chosen senders, writes them to a chat-format JSONL.
+    `row_chunks` is an iterable of DataFrames with the CSV_COLUMNS columns.
+    """
+    count = 0
+    lower_senders = frozenset(s.lower() for s in selected_senders)
+    if not lower_senders:
+        return count
+
+    dumps = _json_dumps
+    buf = bytearray()
+    with open(output_jsonl, "wb", buffering=1 << 20) as f_out:
+        write = f_out.write
+        for chunk in row_chunks:
+            mask = chunk["Parsed From"].str.strip().str.lower().isin(lower_senders)
+            matched = chunk.loc[mask]
+            if matched.empty:
+                continue
+
+            user_contents = (
+                "Subject: " + matched["Parsed Subject"].str.strip()
+                + "\nPlease respond with the email body style."
+            )
+            assistant_contents = matched["Parsed Body"].str.strip()
+
+            if pl is not None:
+                _write_messages_ndjson(f_out, user_contents, assistant_contents)
+                count += len(matched)
+                continue
+
+            for user_content, assistant_content in zip(user_contents, assistant_contents):
                 data_line = {
                     "messages": [
                         {"role": "user", "content": user_content},
                         {"role": "assistant", "content": assistant_content}
                     ]
                 }
-                f_out.write(json.dumps(data_line) + "\n")
+                buf += dumps(data_line)
+                buf += b"\n"
                 count += 1
+                # Write in ~64 KB batches rather than once per row
+                if len(buf) >= JSONL_FLUSH_BYTES:
+                    write(buf)
+                    buf.clear()
+        if buf:
+            write(buf)
     return count
 
 ###############################################################################
 # 3. Misc Utility
 ###############################################################################
+@st.cache_resource(show_spinner=False)
+def get_openai_client(api_key: str) -> OpenAI:
+    """
+    Build one OpenAI client per API key and reuse it across reruns,
+    so its HTTP connection pool (and TLS sessions) stay warm.
+    The long timeout and connect retries let large training-file uploads
+    survive slow links and transient network errors.
+    """
+    return OpenAI(
+        api_key=api_key,
+        http_client=httpx.Client(
+            timeout=httpx.Timeout(600.0),
+            # Pool limits belong on the transport once a custom one is given
+            transport=httpx.HTTPTransport(
+                retries=3,
+                limits=httpx.Limits(max_keepalive_connections=20)
+            ),
+        ),
+    )
+
+def build_chat_messages(system_prompt: str, user_prompt: str) -> list:
+    """Chat messages for a single-turn request, with the system prompt only if non-blank."""
+    messages = []
+    if system_prompt.strip():
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": user_prompt})
+    return messages
+
+RETRY_MAX_WAIT = 60  # seconds; also caps a server-sent Retry-After
+_rate_limit_backoff = wait_exponential(multiplier=1, max=RETRY_MAX_WAIT) + wait_random(0, 2)
+
+def _wait_for_rate_limit(retry_state) -> float:
+    """
+    Seconds to wait before retrying: the server's Retry-After if it sent one
+    (capped at RETRY_MAX_WAIT), else exponential backoff.
+    """
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    if response is not None:
+        for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+            try:
+                return min(float(response.headers[header]) * scale, RETRY_MAX_WAIT)
+            except (KeyError, ValueError):
+                continue
+    return _rate_limit_backoff(retry_state)
+
+# Retries chat calls on 429s and on the transient failures the SDK would
+# otherwise retry itself (connection drops, timeouts, 5xx); works on both sync
+# and async functions. The clients passed to these calls have their own
+# retries turned off so the two layers don't multiply.
+retry_on_rate_limit = retry(
+    retry=retry_if_exception_type((
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.InternalServerError
+    )),
+    wait=_wait_for_rate_limit,
+    stop=stop_after_attempt(6),
+    reraise=True
+)
+
+@retry_on_rate_limit
+def _chat(client: OpenAI, model_id: str, messages: list, temp: float) -> str:
+    """One chat completion, retried on rate limits and transient errors; returns the reply text."""
+    response = client.with_options(max_retries=0).chat.completions.create(
+        model=model_id,
+        messages=messages,
+        temperature=temp
+    )
+    return response.choices[0].message.content
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_chat(_client: OpenAI, model_id: str, system_prompt: str, user_prompt: str, temp: float) -> str:
+    """
+    Single chat completion, memoized on (model_id, system_prompt, user_prompt, temp)
+    for an hour so re-clicking with unchanged inputs doesn't hit the API again.
+    """
+    return _chat(_client, model_id, build_chat_messages(system_prompt, user_prompt), temp)
+
+def _run_chat(client: OpenAI, model_id: str, system_prompt: str, user_prompt: str, temp: float, label: str):
+    """Generate a completion and write it under `label`, or show the error."""
+    with st.spinner("Generating..."):
+        try:
+            txt = _cached_chat(client, model_id, system_prompt, user_prompt, temp)
+        except Exception as e:
+            st.error(f"Error generating response: {e}")
+            return
+    st.write(label)
+    st.write(txt)
+
+async def _complete_concurrently(api_key: str, model_id: str, message_lists: list, temperature: float) -> list:
+    """
+    Run one chat completion per entry of `message_lists` concurrently and
+    return the texts in the same order (an Exception in place of a failed one).
+    """
+    # The async client is scoped to this event loop; asyncio.run() makes a new
+    # loop per call, so it can't be shared across reruns like the sync client.
+    async with AsyncOpenAI(api_key=api_key, max_retries=0) as aclient:
+        @retry_on_rate_limit
+        async def _one(messages):
+            response = await aclient.chat.completions.create(
+                model=model_id,
+                messages=messages,
+                temperature=temperature
+            )
+            return response.choices[0].message.content
+
+        return await asyncio.gather(*(_one(m) for m in message_lists), return_exceptions=True)
+
+POLL_INTERVAL_START_MS = 10_000
+POLL_INTERVAL_MAX_MS = 300_000
+FINETUNE_TERMINAL_STATUSES = {"succeeded", "failed", "cancelled"}
+
+def poll_job_status(state_key: str, fetch_status, backoff_statuses, force: bool = False) -> tuple:
+    """
+    Return (status_dict, poll_interval_ms, error) for a long-running OpenAI job.
+    `fetch_status()` is only called once the current poll interval has elapsed
+    (or always, with `force`); in between, the last result is served from
+    st.session_state[state_key].
+    The interval doubles (up to POLL_INTERVAL_MAX_MS) after each fetch that
+    reports one of `backoff_statuses`. A failed fetch doesn't raise: it is
+    returned as `error` alongside the last good status (None if there is none)
+    and the interval drops back to POLL_INTERVAL_START_MS, so callers keep
+    their refresh scheduled through transient errors.
+    """
+    poll = st.session_state.get(state_key)
+    now = time.time()
+    if force or poll is None or now - poll["fetched_at"] >= poll["interval_ms"] / 1000:
+        try:
+            status = fetch_status()
+        except Exception as e:
+            poll = {
+                "status": poll["status"] if poll else None,
+                "error": str(e),
+                "fetched_at": now,
+                "interval_ms": POLL_INTERVAL_START_MS
+            }
+        else:
+            interval_ms = poll["interval_ms"] if poll else POLL_INTERVAL_START_MS
+            if status.get("status") in backoff_statuses:
+                interval_ms = min(interval_ms * 2, POLL_INTERVAL_MAX_MS)
+            poll = {"status": status, "error": None, "fetched_at": now, "interval_ms": interval_ms}
+        st.session_state[state_key] = poll
+    return poll["status"], poll["interval_ms"], poll["error"]
+
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+def split_sample_emails(text: str) -> list:
+    """Split pasted sample emails on lines containing only '---'; blank samples are dropped."""
+    samples = re.split(r"^\s*---\s*$", text, flags=re.MULTILINE)
+    return [sample.strip() for sample in samples if sample.strip()]
+
+def submit_batch_test(client: OpenAI, model_id: str, system_prompt: str, user_prompts: list, temp: float) -> str:
+    """
+    Upload one chat-completion request per prompt as a Batch API input file,
+    start the batch, and return its ID. Request i gets custom_id "sample-<i>".
+    """
+    requests_jsonl = b"".join(
+        _json_dumps({
+            "custom_id": f"sample-{i}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model_id,
+                "messages": build_chat_messages(system_prompt, prompt),
+                "temperature": temp
+            }
+        }) + b"\n"
+        for i, prompt in enumerate(user_prompts)
+    )
+    input_file = client.files.create(
+        file=("batch_test.jsonl", requests_jsonl, "application/jsonl"),
+        purpose="batch"
+    )
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    return batch.id
+
+@st.cache_data(show_spinner="Downloading batch results...")
+def fetch_batch_results(_client: OpenAI, output_file_id: str) -> dict:
+    """
+    Download a finished batch's output file and return custom_id -> reply text.
+    Requests that came back with an error map to an "Error: ..." string instead.
+    """
+    results = {}
+    for line in _client.files.content(output_file_id).read().splitlines():
+        if not line.strip():
+            continue
+        record = _json_loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            results[record["custom_id"]] = f"Error: {record.get('error') or response.get('body')}"
+        else:
+            results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    return results
+
+@functools.lru_cache(maxsize=8192)
 def get_first_name(full_name: str) -> str:
     """Extract first name from a full name string."""
-    return full_name.split()[0] if full_name else ""
+    return full_name.partition(" ")[0] if full_name else ""
 
 ###############################################################################
 # 4. The Main Admin GUI
@@ -134,11 +480,11 @@ def create_admin_gui():
         st.warning("No OPENAI_API_KEY found. Please enter it below or stop.")
         user_key = st.text_input("OpenAI API Key", type="password")
         if user_key:
-            client = OpenAI(api_key=user_key)
+            client = get_openai_client(user_key)
         else:
             st.stop()
     else:
-        client = OpenAI(api_key=openai_api_key)
+        client = get_openai_client(openai_api_key)
 
     # B) Load or merge existing models
     if "fine_tuned_models" not in st.session_state:
@@ -178,27 +524,9 @@ def create_admin_gui():
                     height=200,
                     key="test_models_rewrite_email"
                 )
+                rewrite_prompt = f"Please rewrite this email:\n\n{email_to_rewrite}"
                 if st.button("Generate Rewrite", key="rewrite_button"):
-                    with st.spinner("Generating..."):
-                        try:
-                            messages = []
-                            if system_prompt.strip():
-                                messages.append({"role": "system", "content": system_prompt})
-                            messages.append({
-                                "role": "user",
-                                "content": f"Please rewrite this email:\n\n{email_to_rewrite}"
-                            })
-
-                            response = client.chat.completions.create(
-                                model=chosen_model_id,
-                                messages=messages,
-                                temperature=temp_val
-                            )
-                            txt = response.choices[0].message.content
-                            st.write("**Rewritten Email:**")
-                            st.write(txt)
-                        except Exception as e:
-                            st.error(f"Error generating response: {e}")
+                    _run_chat(client, chosen_model_id, system_prompt, rewrite_prompt, temp_val, "**Rewritten Email:**")
 
             # 2) Modify Reply
             with test_tabs[1]:
@@ -212,60 +540,112 @@ def create_admin_gui():
                         "Your Reply:", height=200, key="test_models_modify_reply"
                     )
 
+                if not my_reply_mod.strip():
+                    modify_prompt = f"Please rewrite this email:\n\n{original_email_mod}"
+                else:
+                    modify_prompt = (
+                        f"Original Email:\n{original_email_mod}\n\n"
+                        f"Your Reply:\n{my_reply_mod}\n\n"
+                        f"Please improve this reply while maintaining the same general message."
+                    )
+                modify_label = "**Modified Reply:**" if my_reply_mod.strip() else "**Rewritten Email:**"
+
                 if st.button("Generate Modified Reply", key="modify_reply_button"):
-                    with st.spinner("Generating..."):
-                        try:
-                            if not my_reply_mod.strip():
-                                prompt = f"Please rewrite this email:\n\n{original_email_mod}"
-                            else:
-                                prompt = (
-                                    f"Original Email:\n{original_email_mod}\n\n"
-                                    f"Your Reply:\n{my_reply_mod}\n\n"
-                                    f"Please improve this reply while maintaining the same general message."
-                                )
-
-                            messages = []
-                            if system_prompt.strip():
-                                messages.append({"role": "system", "content": system_prompt})
-                            messages.append({"role": "user", "content": prompt})
-
-                            response = client.chat.completions.create(
-                                model=chosen_model_id,
-                                messages=messages,
-                                temperature=temp_val
-                            )
-                            txt = response.choices[0].message.content
-                            st.write("**Modified Reply:**" if my_reply_mod.strip() else "**Rewritten Email:**")
-                            st.write(txt)
-                        except Exception as e:
-                            st.error(f"Error generating response: {e}")
+                    _run_chat(client, chosen_model_id, system_prompt, modify_prompt, temp_val, modify_label)
 
             # 3) Generate Reply
             with test_tabs[2]:
                 original_email_gen = st.text_area(
                     "Original Email:", height=200, key="test_models_generate_original"
                 )
+                reply_prompt = f"Please write a reply to this email:\n\n{original_email_gen}"
                 if st.button("Generate Reply", key="generate_reply_button"):
-                    with st.spinner("Generating..."):
-                        try:
-                            messages = []
-                            if system_prompt.strip():
-                                messages.append({"role": "system", "content": system_prompt})
-                            messages.append({
-                                "role": "user",
-                                "content": f"Please write a reply to this email:\n\n{original_email_gen}"
-                            })
-
-                            response = client.chat.completions.create(
-                                model=chosen_model_id,
-                                messages=messages,
-                                temperature=temp_val
-                            )
-                            txt = response.choices[0].message.content
-                            st.write("**Generated Reply:**")
-                            st.write(txt)
-                        except Exception as e:
-                            st.error(f"Error generating response: {e}")
+                    _run_chat(client, chosen_model_id, system_prompt, reply_prompt, temp_val, "**Generated Reply:**")
+
+            # 4) All three at once, with the requests sent concurrently
+            if st.button("Run All Three", key="run_all_button"):
+                with st.spinner("Generating..."):
+                    results = asyncio.run(_complete_concurrently(
+                        client.api_key,
+                        chosen_model_id,
+                        [
+                            build_chat_messages(system_prompt, rewrite_prompt),
+                            build_chat_messages(system_prompt, modify_prompt),
+                            build_chat_messages(system_prompt, reply_prompt),
+                        ],
+                        temp_val
+                    ))
+                labels = ["**Rewritten Email:**", modify_label, "**Generated Reply:**"]
+                for col, label, result in zip(st.columns(3), labels, results):
+                    with col:
+                        if isinstance(result, Exception):
+                            st.error(f"Error generating response: {result}")
+                        else:
+                            st.write(label)
+                            st.write(result)
+
+            # 5) Batch test: replies to many sample emails via the OpenAI Batch API
+            st.markdown("---")
+            st.markdown("#### Batch Test")
+            """
+            Paste several sample emails, separated by a line containing only `---`.
+            Each one is sent as a **Generate Reply** request through the OpenAI Batch API,
+            which is cheaper but asynchronous (results can take a while).
+            """
+            sample_emails = split_sample_emails(
+                st.text_area("Sample emails:", height=200, key="batch_test_emails")
+            )
+            if st.button(f"Batch test on {len(sample_emails)} sample emails", key="batch_test_button"):
+                if not sample_emails:
+                    st.warning("Please paste at least one sample email.")
+                else:
+                    try:
+                        batch_id = submit_batch_test(
+                            client,
+                            chosen_model_id,
+                            system_prompt,
+                            [f"Please write a reply to this email:\n\n{email}" for email in sample_emails],
+                            temp_val
+                        )
+                        st.session_state["current_batch_test"] = {"id": batch_id, "emails": sample_emails}
+                        st.success(f"Batch created! Batch ID: {batch_id}")
+                    except Exception as e:
+                        st.error(f"Error creating batch: {e}")
+
+            if "current_batch_test" in st.session_state:
+                batch_id = st.session_state["current_batch_test"]["id"]
+                batch_emails = st.session_state["current_batch_test"]["emails"]
+                batch_status, batch_poll_ms, batch_poll_error = poll_job_status(
+                    f"batch_poll_{batch_id}",
+                    lambda: client.batches.retrieve(batch_id).to_dict(),
+                    backoff_statuses={"in_progress", "finalizing"}
+                )
+                if batch_poll_error:
+                    st.error(f"Error retrieving batch status: {batch_poll_error}")
+                # Keep polling through failed fetches; stop once the batch can no longer change
+                if batch_status is None or batch_status["status"] not in BATCH_TERMINAL_STATUSES:
+                    st_autorefresh(interval=batch_poll_ms, limit=1000, key="batch_auto_refresh")
+
+                if batch_status is not None:
+                    try:
+                        counts = batch_status.get("request_counts") or {}
+                        st.write(
+                            f"Batch `{batch_id}`: **{batch_status['status']}** "
+                            f"({counts.get('completed', 0)}/{counts.get('total', len(batch_emails))} done)"
+                        )
+
+                        if batch_status["status"] == "completed" and batch_status.get("output_file_id"):
+                            batch_results = fetch_batch_results(client, batch_status["output_file_id"])
+                            for i, email in enumerate(batch_emails):
+                                with st.expander(f"Sample {i + 1}", expanded=False):
+                                    st.write("**Original Email:**")
+                                    st.write(email)
+                                    st.write("**Generated Reply:**")
+                                    st.write(batch_results.get(f"sample-{i}", "No result returned for this sample."))
+                        elif batch_status["status"] in BATCH_TERMINAL_STATUSES:
+                            st.error(f"Batch ended with status '{batch_status['status']}' and no results.")
+                    except Exception as e:
+                        st.error(f"Error retrieving batch results: {e}")
 
     ###########################################################################
     # TAB 2: MANAGE MODELS
@@ -319,27 +699,14 @@ def create_admin_gui():
 
             st.write("---")
             if st.button("Save All Changes"):
-                # Apply the updated data to session
+                # Apply updates and removals to the session, then persist it as-is
                 for alias, val in updated_data.items():
-                    if alias not in removed_aliases:
+                    if alias in removed_aliases:
+                        st.session_state["fine_tuned_models"].pop(alias, None)
+                    else:
                         st.session_state["fine_tuned_models"][alias] = val
 
-                # Remove any aliases that are flagged
-                for r_alias in removed_aliases:
-                    if r_alias in st.session_state["fine_tuned_models"]:
-                        del st.session_state["fine_tuned_models"][r_alias]
-
-                # Save to disk
-                user_models = load_saved_models()  # current disk data
-                # Overwrite or remove as needed
-                for alias, val in updated_data.items():
-                    if alias not in removed_aliases:
-                        user_models[alias] = val
-                for r_alias in removed_aliases:
-                    if r_alias in user_models:
-                        del user_models[r_alias]
-
-                save_saved_models(user_models)
+                save_saved_models(st.session_state["fine_tuned_models"])
                 st.success("All changes saved!")
 
         st.markdown("---")
@@ -362,9 +729,7 @@ def create_admin_gui():
                     "public": public_in
                 }
                 # Update disk
-                user_models = load_saved_models()
-                user_models[alias_in] = {"id": id_in, "public": public_in}
-                save_saved_models(user_models)
+                save_saved_models(st.session_state["fine_tuned_models"])
 
                 st.success(f"Model '{alias_in}' added/updated successfully!")
             else:
@@ -383,42 +748,27 @@ def create_admin_gui():
         )
 
         if csv_files:
-            all_rows = read_rows_from_multiple_csvs(csv_files)
-            if not all_rows:
+            rows_df, senders = parse_uploaded_csvs(
+                tuple((f.name, f.getvalue()) for f in csv_files)
+            )
+            if rows_df.empty:
                 st.warning("No data read from CSV(s). Check your file format.")
             else:
-                # Gather unique senders
-                senders = set()
-                for row in all_rows:
-                    frm = (row.get("Parsed From") or "").strip()
-                    if frm:
-                        senders.add(frm)
-                senders = sorted(senders)
 
                 group_by_first_name = st.checkbox("Group senders by first name", value=False)
                 if group_by_first_name:
-                    grouped_senders = {}
+                    grouped_senders = defaultdict(list)
                     for sender in senders:
-                        first_name = get_first_name(sender)
-                        if first_name not in grouped_senders:
-                            grouped_senders[first_name] = []
-                        grouped_senders[first_name].append(sender)
-
-                    display_senders = []
-                    for fn, full_list in grouped_senders.items():
-                        if len(full_list) > 1:
-                            display_senders.append(f"{fn} (All variations)")
-                        else:
-                            display_senders.append(full_list[0])
-
-                    selected_disp = st.multiselect("Select Sender(s) to Filter On", sorted(display_senders))
-                    selected_senders = []
-                    for d in selected_disp:
-                        if d.endswith("(All variations)"):
-                            fn = d.split()[0]
-                            selected_senders.extend(grouped_senders[fn])
-                        else:
-                            selected_senders.append(d)
+                        grouped_senders[get_first_name(sender)].append(sender)
+
+                    # Display label -> the full sender names it stands for
+                    display_to_senders = {
+                        (f"{fn} (All variations)" if len(full_list) > 1 else full_list[0]): full_list
+                        for fn, full_list in grouped_senders.items()
+                    }
+
+                    selected_disp = st.multiselect("Select Sender(s) to Filter On", sorted(display_to_senders))
+                    selected_senders = [s for d in selected_disp for s in display_to_senders[d]]
                 else:
                     selected_senders = st.multiselect("Select Sender(s) to Filter On", senders)
 
@@ -426,7 +776,7 @@ def create_admin_gui():
                     st.write("Selected Sender(s):", selected_senders)
                     if st.button("Generate JSONL for Selected Senders"):
                         jsonl_file_name = "filtered_data.jsonl"
-                        count = build_jsonl_for_senders(all_rows, selected_senders, jsonl_file_name)
+                        count = build_jsonl_for_senders([rows_df], selected_senders, jsonl_file_name)
                         if count > 0:
                             st.success(f"Created {jsonl_file_name} with {count} examples.")
                             st.session_state["jsonl_file"] = jsonl_file_name
@@ -452,8 +802,12 @@ def create_admin_gui():
             else:
                 file_path = st.session_state["jsonl_file"]
                 try:
+                    # Pass the open file (not its bytes) so the upload streams from disk
                     with open(file_path, "rb") as f:
-                        resp = client.files.create(file=f, purpose="fine-tune")
+                        resp = client.files.create(
+                            file=(os.path.basename(file_path), f, "application/jsonl"),
+                            purpose="fine-tune"
+                        )
                     file_id = resp.id
                     st.write(f"Uploaded training file. File ID = {file_id}")
                 except Exception as e:
@@ -488,35 +842,48 @@ def create_admin_gui():
             job_id = st.session_state["current_finetune_job"]
             st.write(f"Current Fine-Tune Job ID: {job_id}")
 
-            try:
-                if enable_auto_refresh:
-                    count_refreshed = st_autorefresh(interval=10_000, limit=1000, key="ft_auto_refresh")
-                    st.write(f"**Job Status (auto-refreshed {count_refreshed} times)**:")
-                else:
-                    st.write("**Job Status**:")
+            # With auto-refresh off, every manual rerun fetches a fresh status
+            status, poll_interval_ms, poll_error = poll_job_status(
+                f"finetune_poll_{job_id}",
+                lambda: client.fine_tuning.jobs.retrieve(job_id).to_dict(),
+                backoff_statuses={"running"},
+                force=not enable_auto_refresh
+            )
+            if poll_error:
+                st.error(f"Error retrieving job status: {poll_error}")
+
+            # Keep refreshing through failed fetches; no point once the job can no longer change
+            if enable_auto_refresh and (status is None or status["status"] not in FINETUNE_TERMINAL_STATUSES):
+                count_refreshed = st_autorefresh(interval=poll_interval_ms, limit=1000, key="ft_auto_refresh")
+                st.write(
+                    f"**Job Status (auto-refreshed {count_refreshed} times, "
+                    f"every {poll_interval_ms // 1000}s)**:"
+                )
+            else:
+                st.write("**Job Status**:")
 
-                status = client.fine_tuning.jobs.retrieve(job_id)
-                st.json(status.to_dict())
+            if status is not None:
+                try:
+                    st.json(status)
 
-                if status.status == "succeeded":
-                    st.success("Fine-tune succeeded!")
-                    ft_model = status.fine_tuned_model
-                    if not ft_model:
-                        st.warning("No 'fine_tuned_model' found in response.")
-                    else:
-                        new_key = f"{ft_model}-{len(st.session_state['fine_tuned_models'])+1}"
-                        # Newly fine-tuned models default to public = True
-                        st.session_state["fine_tuned_models"][new_key] = {"id": ft_model, "public": True}
-
-                        user_models = load_saved_models()
-                        user_models[new_key] = {"id": ft_model, "public": True}
-                        save_saved_models(user_models)
-
-                        st.write(f"Fine-tuned model: `{ft_model}` stored in session & disk.")
-                elif status.status == "failed":
-                    st.error("Fine-tune failed.")
-            except Exception as e:
-                st.error(f"Error retrieving job status: {e}")
+                    if status["status"] == "succeeded":
+                        st.success("Fine-tune succeeded!")
+                        ft_model = status.get("fine_tuned_model")
+                        if not ft_model:
+                            st.warning("No 'fine_tuned_model' found in response.")
+                        else:
+                            new_key = f"{ft_model}-{len(st.session_state['fine_tuned_models'])+1}"
+                            # Newly fine-tuned models default to public = True
+                            st.session_state["fine_tuned_models"][new_key] = {"id": ft_model, "public": True}
+                            save_saved_models(st.session_state["fine_tuned_models"])
+
+                            st.write(f"Fine-tuned model: `{ft_model}` stored in session & disk.")
+                    elif status["status"] == "failed":
+                        st.error("Fine-tune failed.")
+                    elif status["status"] == "cancelled":
+                        st.warning("Fine-tune was cancelled.")
+                except Exception as e:
+                    st.error(f"Error handling job status: {e}")
         else:
             st.info("No active fine-tune job to monitor.")
 
@@ -1,11 +1,20 @@
 import os
+import re
 import json
+import functools
 import streamlit as st
 from openai import OpenAI
 from datetime import datetime
 import time
+import threading
+from collections import OrderedDict
 import warnings
 
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib decoder
+    orjson = None
+
 # Suppress specific warnings
 warnings.filterwarnings("ignore", category=UserWarning, message="missing ScriptRunContext")
 
@@ -17,60 +26,173 @@ st._is_running_with_streamlit = False
 ###############################################################################
 MODELS_JSON_FILE = "my_saved_models.json"
 
-def load_saved_models():
+def models_file_mtime() -> float:
+    """Modification time of MODELS_JSON_FILE (0.0 if it doesn't exist), used as a cache key."""
+    try:
+        return os.path.getmtime(MODELS_JSON_FILE)
+    except OSError:
+        return 0.0
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_saved_models(mtime: float = 0.0):
     """
     Load previously saved models from local JSON file, or return an empty dict.
     Each model is stored as: alias -> {"id": <str>, "public": <bool>}
+    Cached across reruns; pass models_file_mtime() so edits to the file
+    invalidate the cache right away instead of after the TTL.
+    A file that can't be read or parsed (e.g. caught mid-write by the admin app)
+    raises instead, so the failure isn't cached and the next rerun tries again.
     """
-    if os.path.exists(MODELS_JSON_FILE):
-        try:
-            with open(MODELS_JSON_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    return data
-        except Exception as e:
-            st.warning(f"Could not read {MODELS_JSON_FILE}: {e}")
-    return {}
+    try:
+        # One large buffered read, then parse from memory
+        with open(MODELS_JSON_FILE, "rb", buffering=65536) as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return {}
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    return data if isinstance(data, dict) else {}
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_public_models(mtime: float = 0.0):
+    """
+    alias -> model ID for every model visible to the public, sorted by alias.
+    Cached per models_file_mtime(), so the filtering runs once per file version.
+    """
+    public_models = {}
+    for alias, model_info in sorted(load_saved_models(mtime).items()):
+        # If the model entry is a dict with 'id' and 'public' keys
+        if isinstance(model_info, dict):
+            # Only show if public == True
+            if model_info.get("public", True):
+                public_models[alias] = model_info["id"]
+        # If it's an older string-based entry, we assume it's public
+        elif isinstance(model_info, str):
+            public_models[alias] = model_info
+    return public_models
 
 ###############################################################################
 # 2. Minimalist Swiss-Style Public GUI
 ###############################################################################
+@st.cache_resource(show_spinner=False)
+def get_openai_client(api_key: str) -> OpenAI:
+    """
+    One OpenAI client per API key, reused across reruns so its connection pool stays warm.
+    A background models.list() opens the connection up front, so the first
+    generation doesn't pay the TCP/TLS handshake.
+    """
+    client = OpenAI(api_key=api_key)
+
+    def warm_up():
+        try:
+            client.models.list()
+        except Exception:
+            pass  # only a warm-up; real requests report their own errors
+
+    threading.Thread(target=warm_up, daemon=True).start()
+    return client
+
+@functools.lru_cache(maxsize=1)
+def _client_from_env():
+    """The server's client, resolved once per process from OPENAI_API_KEY (None if unset)."""
+    openai_api_key = os.environ.get("OPENAI_API_KEY", "")
+    return get_openai_client(openai_api_key) if openai_api_key else None
+
+CHAT_CACHE_TTL = 3600  # seconds
+CHAT_CACHE_MAX_ENTRIES = 500  # oldest replies are evicted past this
+MAX_RESPONSE_TOKENS = 800  # caps cost and latency of long-tail generations
+
+@st.cache_resource(show_spinner=False)
+def _chat_cache():
+    """
+    Process-wide store for _chat: request key -> (time stored, reply text),
+    kept oldest-first so expiry and the size cap both evict from the front.
+    """
+    return {"lock": threading.Lock(), "entries": OrderedDict()}
+
+def _chat(client, model, system_prompt, user_prompt, temp, sample=0, on_delta=None,
+          max_tokens=MAX_RESPONSE_TOKENS):
+    """
+    One chat completion of at most `max_tokens` tokens, memoized for an hour on
+    (model, system_prompt, user_prompt, temp, max_tokens, sample) so identical
+    requests skip the API.
+    `sample` tells apart the several responses wanted for the same input,
+    which would otherwise all come back as the same cached text.
+    On a cache miss the reply is streamed and `on_delta(text_so_far)` is called
+    as tokens arrive. (st.cache_data can't wrap this: it would try to replay
+    the on_delta writes into a placeholder created outside the function.)
+    Callers pass an already-stripped `system_prompt`; an empty one is omitted.
+    """
+    cache = _chat_cache()
+    key = (model, system_prompt, user_prompt, temp, max_tokens, sample)
+    with cache["lock"]:
+        hit = cache["entries"].get(key)
+    if hit and time.time() - hit[0] < CHAT_CACHE_TTL:
+        return hit[1]
+
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": user_prompt})
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temp,
+        max_tokens=max_tokens,
+        stream=True
+    )
+    parts = []
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            if on_delta:
+                on_delta("".join(parts))
+    text = "".join(parts)
+
+    now = time.time()
+    with cache["lock"]:
+        entries = cache["entries"]
+        entries[key] = (now, text)
+        entries.move_to_end(key)
+        while entries:
+            stored, _ = next(iter(entries.values()))
+            if now - stored < CHAT_CACHE_TTL and len(entries) <= CHAT_CACHE_MAX_ENTRIES:
+                break
+            entries.popitem(last=False)
+    return text
+
+# Order matters: the handlers below index into st.tabs() by position
+TAB_LABELS = ("Rewrite Email", "Generate Reply", "Modify Reply")
+
 def create_public_gui():
     # Minimal heading instead of big title
     # st.markdown("## Email Tools (Public)")
 
     # A) OpenAI API key handling
-    openai_api_key = os.environ.get("OPENAI_API_KEY", "")
-    if not openai_api_key:
+    client = _client_from_env()
+    if client is None:
         st.error("No OPENAI_API_KEY found on the server. Please configure it or enter manually.")
         user_key = st.text_input("OpenAI API Key", type="password")
         if not user_key:
             return
-        client = OpenAI(api_key=user_key)
-    else:
-        client = OpenAI(api_key=openai_api_key)
+        client = get_openai_client(user_key)
 
-    # B) Load models from disk
-    all_models = load_saved_models()
+    # Generated responses per tab, kept across reruns
+    for state_key in ("rewrite_out", "reply_out", "modify_out"):
+        st.session_state.setdefault(state_key, None)
 
-    # Filter out models where "public" is False
-    public_models = {}
-    for alias, model_info in all_models.items():
-        # If the model entry is a dict with 'id' and 'public' keys
-        if isinstance(model_info, dict):
-            # Only show if public == True
-            if model_info.get("public", True):
-                public_models[alias] = model_info["id"]
-        # If it's an older string-based entry, we assume it's public
-        elif isinstance(model_info, str):
-            public_models[alias] = model_info
+    # B) Load public models from disk (models where "public" is False are filtered out)
+    try:
+        public_models = get_public_models(models_file_mtime())
+    except Exception as e:
+        st.warning(f"Could not read {MODELS_JSON_FILE}: {e}")
+        public_models = {}
 
     if not public_models:
         st.warning("No publicly visible models. Please contact the admin or make some models public.")
         return
 
     # Automatically select the top two models by alphabetical order
-    model_keys = sorted(public_models.keys())
+    model_keys = list(public_models)  # already sorted by alias
     if len(model_keys) < 2:
         st.warning("Not enough public models available.")
         return
@@ -89,6 +211,8 @@ def create_public_gui():
     protected_names = ['Jos', 'Scott', 'Lesley', 'Diaz']
     if not any(name in sender_name for name in protected_names):
         system_prompt += "\nIMPORTANT: NEVER use the names Jos, Scott, Lesley, or Diaz in your responses."
+    # Strip once per rerun; _chat only checks for an empty prompt
+    system_prompt = system_prompt.strip()
 
     # Remove the temperature slider
     # temp_val = st.slider("Temperature", min_value=0.0, max_value=2.0, value=0.7, step=0.1)
@@ -98,7 +222,7 @@ def create_public_gui():
     # st.markdown("### Email Rewrite / Reply Tools")
 
     # Tabs for rewriting, modifying, and generating replies
-    tabs = st.tabs(["Rewrite Email", "Generate Reply", "Modify Reply"])
+    tabs = st.tabs(TAB_LABELS)
 
     def is_response_clean(response_text, protected_names, input_text):
         """Check if response contains any protected names that weren't in the input"""
@@ -107,15 +231,40 @@ def create_public_gui():
                 return False
         return True
 
-    def get_clean_response(client, model, messages, temp_val, protected_names, input_text, max_attempts=3):
-        """Get a response that doesn't contain protected names (unless they were in input)"""
+    def mask_protected_names(text, protected_names, input_text):
+        """Replace protected names that weren't in the input with [Name]"""
+        for name in protected_names:
+            if name.lower() in text.lower() and name.lower() not in input_text.lower():
+                text = text.replace(name, '[Name]')
+                # Also handle case variations
+                text = text.replace(name.lower(), '[Name]')
+                text = text.replace(name.upper(), '[Name]')
+                text = text.replace(name.capitalize(), '[Name]')
+        return text
+
+    def preview_partial_response(text, protected_names, input_text):
+        """Scrubbed view of a response still streaming in: whole words only, names masked"""
+        # Hold back the trailing partial word so a name can't show half-typed
+        text = text[:max(text.rfind(" "), text.rfind("\n")) + 1]
+        text = text.replace('Santiago', '').replace('Santi', '')
+        return mask_protected_names(text, protected_names, input_text)
+
+    def get_clean_response(client, model, system_prompt, user_prompt, temp_val, protected_names, input_text,
+                           sample=0, max_attempts=3, preview=None):
+        """
+        Get a response that doesn't contain protected names (unless they were in input).
+        If `preview` (an st.empty placeholder) is given, the response is shown there as it streams.
+        """
+        on_delta = None
+        if preview is not None:
+            on_delta = lambda text: preview.markdown(preview_partial_response(text, protected_names, input_text))
+
         for attempt in range(max_attempts):
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temp_val
+            # Each retry needs a fresh completion, not the cached one that just failed the check
+            response_text = _chat(
+                client, model, system_prompt, user_prompt, temp_val,
+                sample=sample * max_attempts + attempt, on_delta=on_delta
             )
-            response_text = response.choices[0].message.content
             # Remove 'Santiago' and 'Santi' from the response
             response_text = response_text.replace('Santiago', '').replace('Santi', '')
             if is_response_clean(response_text, protected_names, input_text):
@@ -123,15 +272,7 @@ def create_public_gui():
             
             # On last attempt, replace protected names with [Name]
             if attempt == max_attempts - 1:
-                modified_text = response_text
-                for name in protected_names:
-                    if name.lower() in modified_text.lower() and name.lower() not in input_text.lower():
-                        modified_text = modified_text.replace(name, '[Name]')
-                        # Also handle case variations
-                        modified_text = modified_text.replace(name.lower(), '[Name]')
-                        modified_text = modified_text.replace(name.upper(), '[Name]')
-                        modified_text = modified_text.replace(name.capitalize(), '[Name]')
-                return modified_text
+                return mask_protected_names(response_text, protected_names, input_text)
         return None  # This should never be reached now
 
     def calculate_text_height(text, min_height=150):
@@ -142,105 +283,87 @@ def create_public_gui():
         calculated_height = (num_lines + 1) * height_per_line
         return min(max(calculated_height, min_height), 800)  # Cap between min_height and 800px
 
-    # Add CSS to make text areas full width and style error messages
-    st.markdown("""
-        <style>
-        .stTextArea textarea {
-            width: 100% !important;
-            box-sizing: border-box !important;
-        }
-        .stAlert {
-            background-color: #e6f3ff !important;
-            border-color: #b3d9ff !important;
-            color: #0066cc !important;
-        }
-        .stAlert > div {
-            color: #0066cc !important;
+    def store_responses(state_key, responses):
+        """Keep generated responses in session state so they survive reruns."""
+        previous = st.session_state[state_key]
+        st.session_state[state_key] = {
+            # Bumped on every generation so the text areas get fresh keys
+            "run": previous["run"] + 1 if previous else 1,
+            "responses": responses,
         }
-        </style>
-    """, unsafe_allow_html=True)
+
+    def render_responses(state_key):
+        """Render the responses stored under st.session_state[state_key], if any."""
+        output = st.session_state[state_key]
+        if not output:
+            return
+        for alias, model_responses in output["responses"].items():
+            response_container = st.container()
+            with response_container:
+                st.markdown("<div style='margin: 15px 0;'>", unsafe_allow_html=True)
+                for i, txt in enumerate(model_responses, 1):
+                    height = calculate_text_height(txt)
+                    st.text_area(
+                        "", value=txt, height=height,
+                        key=f"{state_key}_{output['run']}_{alias}_{i}", label_visibility="collapsed"
+                    )
+                    st.markdown(f"<div style='font-size: 10px; color: #888; text-align: right; margin-top: -5px;'>{alias}</div>", unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+
+    # Add CSS to make text areas full width and style error messages
+    st.markdown(TEXT_AREA_CSS, unsafe_allow_html=True)
+
+    def generate_responses(state_key, user_prompt, input_text, primary_samples, other_samples):
+        """
+        Ask every public model for responses to `user_prompt` and store them under `state_key`.
+        The first chosen model gives `primary_samples` responses, every other model `other_samples`.
+        """
+        with st.spinner("Generating..."):
+            preview = st.empty()
+            try:
+                responses = {alias: [] for alias in public_models.keys()}
+                for alias, model in public_models.items():
+                    num_responses = primary_samples if model == chosen_models[0] else other_samples
+                    for sample in range(num_responses):
+                        clean_response = get_clean_response(
+                            client, model, system_prompt, user_prompt, 0.7,
+                            protected_names, input_text, sample=sample, preview=preview
+                        )
+                        if clean_response:
+                            responses[alias].append(clean_response)
+                        else:
+                            st.warning(f"Could not generate appropriate response after multiple attempts")
+                store_responses(state_key, responses)
+            except Exception as e:
+                st.error(f"Error generating response: {e}")
+            finally:
+                # Don't leave a half-streamed reply on the page, even after an error
+                preview.empty()
 
     # 1) Rewrite Email
     with tabs[0]:
         email_to_rewrite = st.text_area("Enter email to rewrite", height=200)
         if st.button("Rewrite"):
-            with st.spinner("Generating..."):
-                try:
-                    messages = []
-                    if system_prompt.strip():
-                        messages.append({"role": "system", "content": system_prompt})
-                    messages.append({
-                        "role": "user",
-                        "content": f"Please rewrite this email:\n\n{email_to_rewrite}"
-                    })
-
-                    responses = {alias: [] for alias in public_models.keys()}
-                    for alias, model in public_models.items():
-                        num_responses = 3 if model == chosen_models[0] else 1
-                        for _ in range(num_responses):
-                            # Combine all input text for checking
-                            input_text = f"{sender_name} {email_to_rewrite}".lower()
-                            clean_response = get_clean_response(
-                                client, model, messages, 0.7, 
-                                protected_names, input_text
-                            )
-                            if clean_response:
-                                responses[alias].append(clean_response)
-                            else:
-                                st.warning(f"Could not generate appropriate response after multiple attempts")
-
-                    for alias, model_responses in responses.items():
-                        response_container = st.container()
-                        with response_container:
-                            st.markdown("<div style='margin: 15px 0;'>", unsafe_allow_html=True)
-                            for i, txt in enumerate(model_responses, 1):
-                                height = calculate_text_height(txt)
-                                st.text_area("", value=txt, height=height, key=f"response_{alias}_{i}", label_visibility="collapsed")
-                                st.markdown(f"<div style='font-size: 10px; color: #888; text-align: right; margin-top: -5px;'>{alias}</div>", unsafe_allow_html=True)
-                            st.markdown("</div>", unsafe_allow_html=True)
-                except Exception as e:
-                    st.error(f"Error generating response: {e}")
+            generate_responses(
+                "rewrite_out",
+                f"Please rewrite this email:\n\n{email_to_rewrite}",
+                # Combine all input text for checking
+                f"{sender_name} {email_to_rewrite}".lower(),
+                primary_samples=3, other_samples=1
+            )
+        render_responses("rewrite_out")
 
     # 2) Generate Reply
     with tabs[1]:
         original_email = st.text_area("Original Email", height=200, key="generate_original")
         if st.button("Reply"):
-            with st.spinner("Generating..."):
-                try:
-                    messages = []
-                    if system_prompt.strip():
-                        messages.append({"role": "system", "content": system_prompt})
-                    messages.append({
-                        "role": "user",
-                        "content": f"Please write a reply to this email:\n\n{original_email}"
-                    })
-
-                    responses = {alias: [] for alias in public_models.keys()}
-                    for alias, model in public_models.items():
-                        num_responses = 1 if model == chosen_models[0] else 3
-                        for _ in range(num_responses):
-                            # Combine all input text for checking
-                            input_text = f"{sender_name} {original_email}".lower()
-                            clean_response = get_clean_response(
-                                client, model, messages, 0.7, 
-                                protected_names, input_text
-                            )
-                            if clean_response:
-                                responses[alias].append(clean_response)
-                            else:
-                                st.warning(f"Could not generate appropriate response after multiple attempts")
-
-                    for alias, model_responses in responses.items():
-                        response_container = st.container()
-                        with response_container:
-                            st.markdown("<div style='margin: 15px 0;'>", unsafe_allow_html=True)
-                            for i, txt in enumerate(model_responses, 1):
-                                height = calculate_text_height(txt)
-                                st.text_area("", value=txt, height=height, key=f"response_{alias}_{i}", label_visibility="collapsed")
-                                st.markdown(f"<div style='font-size: 10px; color: #888; text-align: right; margin-top: -5px;'>{alias}</div>", unsafe_allow_html=True)
-                            st.markdown("</div>", unsafe_allow_html=True)
-                except Exception as e:
-                    st.error(f"Error generating response: {e}")
+            generate_responses(
+                "reply_out",
+                f"Please write a reply to this email:\n\n{original_email}",
+                f"{sender_name} {original_email}".lower(),
+                primary_samples=1, other_samples=3
+            )
+        render_responses("reply_out")
 
     # 3) Modify Reply
     with tabs[2]:
@@ -251,48 +374,22 @@ def create_public_gui():
             my_reply = st.text_area("Your Reply", height=200, key="modify_reply")
 
         if st.button("Modify"):
-            with st.spinner("Generating..."):
-                try:
-                    if not my_reply.strip():
-                        prompt = f"Please rewrite this email:\n\n{original_email}"
-                    else:
-                        prompt = (
-                            f"Original Email:\n{original_email}\n\n"
-                            f"Your Reply:\n{my_reply}\n\n"
-                            f"Please improve this reply while maintaining the same general message."
-                        )
-
-                    messages = []
-                    if system_prompt.strip():
-                        messages.append({"role": "system", "content": system_prompt})
-                    messages.append({"role": "user", "content": prompt})
-
-                    responses = {alias: [] for alias in public_models.keys()}
-                    for alias, model in public_models.items():
-                        num_responses = 1 if model == chosen_models[0] else 3
-                        for _ in range(num_responses):
-                            # Combine all input text for checking
-                            input_text = f"{sender_name} {original_email} {my_reply}".lower()
-                            clean_response = get_clean_response(
-                                client, model, messages, 0.7, 
-                                protected_names, input_text
-                            )
-                            if clean_response:
-                                responses[alias].append(clean_response)
-                            else:
-                                st.warning(f"Could not generate appropriate response after multiple attempts")
-
-                    for alias, model_responses in responses.items():
-                        response_container = st.container()
-                        with response_container:
-                            st.markdown("<div style='margin: 15px 0;'>", unsafe_allow_html=True)
-                            for i, txt in enumerate(model_responses, 1):
-                                height = calculate_text_height(txt)
-                                st.text_area("", value=txt, height=height, key=f"response_{alias}_{i}", label_visibility="collapsed")
-                                st.markdown(f"<div style='font-size: 10px; color: #888; text-align: right; margin-top: -5px;'>{alias}</div>", unsafe_allow_html=True)
-                            st.markdown("</div>", unsafe_allow_html=True)
-                except Exception as e:
-                    st.error(f"Error generating response: {e}")
+            my_reply = my_reply.strip()
+            if not my_reply:
+                user_prompt = f"Please rewrite this email:\n\n{original_email}"
+            else:
+                user_prompt = (
+                    f"Original Email:\n{original_email}\n\n"
+                    f"Your Reply:\n{my_reply}\n\n"
+                    f"Please improve this reply while maintaining the same general message."
+                )
+            generate_responses(
+                "modify_out",
+                user_prompt,
+                f"{sender_name} {original_email} {my_reply}".lower(),
+                primary_samples=1, other_samples=3
+            )
+        render_responses("modify_out")
 
     # Add timestamp in the top right corner
     now = datetime.now()
@@ -309,72 +406,97 @@ def create_public_gui():
 ###############################################################################
 # 3. Main entrypoint, with minimalist theming
 ###############################################################################
+def _minify_css(css: str) -> str:
+    """Drop comments and collapse whitespace so each rerun ships a one-line <style> block."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s*([{};])\s*", r"\1", css)
+    return re.sub(r"\s+", " ", css).strip()
+
+# Built (and minified) once at import rather than on every rerun
+CSS_BLOCK = _minify_css("""
+<style>
+@media (prefers-color-scheme: dark) {
+    /* Dark mode styles */
+    html, body, [data-testid="stAppViewContainer"] {
+        background-color: #111 !important;
+        color: #fff !important;
+    }
+    textarea, input[type="text"], input[type="password"] {
+        border: 1px solid #444 !important;
+        background-color: #222 !important;
+        color: #fff !important;
+    }
+    .stButton>button {
+        background-color: #444 !important;
+        color: #fff !important;
+    }
+    .stButton>button:hover {
+        background-color: #666 !important;
+    }
+    div[data-baseweb="tab"] > button {
+        background-color: #333 !important;
+        color: #fff !important;
+    }
+    div[data-baseweb="tab"] > button[aria-selected="true"] {
+        background-color: #555 !important;
+        color: #fff !important;
+    }
+}
+@media (prefers-color-scheme: light) {
+    /* Light mode styles */
+    html, body, [data-testid="stAppViewContainer"] {
+        background-color: #ffffff !important;
+        color: #111 !important;
+    }
+    textarea, input[type="text"], input[type="password"] {
+        border: 1px solid #ccc !important;
+        background-color: #fff !important;
+        color: #111 !important;
+    }
+    .stButton>button {
+        background-color: #111 !important;
+        color: #fff !important;
+    }
+    .stButton>button:hover {
+        background-color: #333 !important;
+    }
+    div[data-baseweb="tab"] > button {
+        background-color: #f0f0f0 !important;
+        color: #111 !important;
+    }
+    div[data-baseweb="tab"] > button[aria-selected="true"] {
+        background-color: #111 !important;
+        color: #fff !important;
+    }
+}
+</style>
+""")
+
+TEXT_AREA_CSS = _minify_css("""
+<style>
+.stTextArea textarea {
+    width: 100% !important;
+    box-sizing: border-box !important;
+}
+.stAlert {
+    background-color: #e6f3ff !important;
+    border-color: #b3d9ff !important;
+    color: #0066cc !important;
+}
+.stAlert > div {
+    color: #0066cc !important;
+}
+</style>
+""")
+
 def main():
     # Set page config
     st.set_page_config(page_title="Email Tools (Public)", layout="centered", page_icon="✉️")
     
-    # Automatically switch based on system's dark mode setting
-    st.markdown(
-        """
-        <style>
-        @media (prefers-color-scheme: dark) {
-            /* Dark mode styles */
-            html, body, [data-testid="stAppViewContainer"] {
-                background-color: #111 !important;
-                color: #fff !important;
-            }
-            textarea, input[type="text"], input[type="password"] {
-                border: 1px solid #444 !important;
-                background-color: #222 !important;
-                color: #fff !important;
-            }
-            .stButton>button {
-                background-color: #444 !important;
-                color: #fff !important;
-            }
-            .stButton>button:hover {
-                background-color: #666 !important;
-            }
-            div[data-baseweb="tab"] > button {
-                background-color: #333 !important;
-                color: #fff !important;
-            }
-            div[data-baseweb="tab"] > button[aria-selected="true"] {
-                background-color: #555 !important;
-                color: #fff !important;
-            }
-        }
-        @media (prefers-color-scheme: light) {
-            /* Light mode styles */
-            html, body, [data-testid="stAppViewContainer"] {
-                background-color: #ffffff !important;
-                color: #111 !important;
-            }
-            textarea, input[type="text"], input[type="password"] {
-                border: 1px solid #ccc !important;
-                background-color: #fff !important;
-                color: #111 !important;
-            }
-            .stButton>button {
-                background-color: #111 !important;
-                color: #fff !important;
-            }
-            .stButton>button:hover {
-                background-color: #333 !important;
-            }
-            div[data-baseweb="tab"] > button {
-                background-color: #f0f0f0 !important;
-                color: #111 !important;
-            }
-            div[data-baseweb="tab"] > button[aria-selected="true"] {
-                background-color: #111 !important;
-                color: #fff !important;
-            }
-        }
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
+    # Automatically switch based on system's dark mode setting.
+    # Emitted on every rerun: Streamlit drops elements a rerun doesn't redraw,
+    # so injecting it only once per session would lose the styles.
+    st.markdown(CSS_BLOCK, unsafe_allow_html=True)
 
     # Set a timeout period (in seconds)
     TIMEOUT = 300  # 5 minutes